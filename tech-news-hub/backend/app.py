@@ -1,14 +1,28 @@
-from flask import Flask, jsonify, request
+from flask import Flask, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask_caching import Cache
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from a2wsgi import WSGIMiddleware
 import requests
 import feedparser
+import orjson
+import aiohttp
+import asyncio
+import contextlib
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
-import hashlib
+import calendar
+import xxhash
+from pybloom_live import ScalableBloomFilter
 import os
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 import re
+import sqlite3
 
 app = Flask(__name__)
 CORS(app)
@@ -16,18 +30,66 @@ CORS(app)
 # Database configuration
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///tech_news.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'query_cache_size': 1200,
+        'connect_args': {'check_same_thread': False}
+    }
+else:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'query_cache_size': 1200,
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800
+    }
 db = SQLAlchemy(app)
 
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """Let the periodic fetch's writes coexist with API reads on SQLite"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.close()
+
+# Response cache for the read-only API routes, cleared after every news fetch
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'SimpleCache')
+# Backend location for shared caches, e.g. CACHE_TYPE=RedisCache (needs the redis package)
+app.config['CACHE_REDIS_URL'] = os.getenv('CACHE_REDIS_URL')
+app.config['CACHE_DEFAULT_TIMEOUT'] = 600
+cache = Cache(app)
+
+def is_cacheable(response):
+    """Only cache successful responses"""
+    return response.status_code == 200
+
+def ojson(obj, status=200):
+    """Serialize an API payload with orjson; naive datetimes are emitted as UTC"""
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC),
+        status=status,
+        mimetype='application/json'
+    )
+
 # News Article Model
 class NewsArticle(db.Model):
+    # Serve the source filter and published_time ordering in /api/news from an index
+    __table_args__ = (
+        db.Index('ix_news_source_pub', 'source_name', 'published_time'),
+        db.Index('ix_news_pub', 'published_time'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(500), nullable=False)
     summary = db.Column(db.Text, nullable=False)
     source_url = db.Column(db.String(1000), nullable=False)
     source_name = db.Column(db.String(100), nullable=False)
     published_time = db.Column(db.DateTime, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    content_hash = db.Column(db.String(32), unique=True, nullable=False)
     
     def to_dict(self):
         return {
@@ -36,8 +98,8 @@ class NewsArticle(db.Model):
             'summary': self.summary,
             'source_url': self.source_url,
             'source_name': self.source_name,
-            'published_time': self.published_time.isoformat() if self.published_time else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'published_time': self.published_time,
+            'created_at': self.created_at
         }
 
 # RSS Feed Sources
@@ -52,185 +114,525 @@ RSS_FEEDS = [
     {'name': 'VentureBeat', 'url': 'https://venturebeat.com/feed/'}
 ]
 
+_WS_RE = re.compile(r'\s+')
+
 def clean_text(text):
     """Clean and format text content"""
     if not text:
         return ""
-    # Remove HTML tags
-    soup = BeautifulSoup(text, 'html.parser')
-    text = soup.get_text()
+    # Anything past this point would be cut by the summary limit anyway
+    if len(text) > 4000:
+        text = text[:4000]
+    # Remove HTML tags, skipping the parser for summaries that are already plain text
+    if '<' in text or '&' in text:
+        text = LexborHTMLParser(text).text(separator='')
     # Clean up whitespace
-    text = ' '.join(text.split())
+    text = _WS_RE.sub(' ', text).strip()
     return text[:1000]  # Limit summary length
 
 def generate_content_hash(title, url):
     """Generate unique hash for article to prevent duplicates"""
-    content = f"{title}{url}"
-    return hashlib.sha256(content.encode()).hexdigest()
+    # Non-cryptographic hash: only used as a de-duplication key
+    return xxhash.xxh3_128_hexdigest(title.encode() + b'\x1f' + url.encode())
 
 def parse_published_time(time_struct):
     """Parse RSS time to datetime object"""
+    if not time_struct:
+        return datetime.now(timezone.utc)
     try:
-        if time_struct:
-            return datetime(*time_struct[:6], tzinfo=timezone.utc)
-    except:
-        pass
-    return datetime.now(timezone.utc)
+        return datetime.fromtimestamp(calendar.timegm(time_struct), tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError):
+        return datetime.now(timezone.utc)
+
+def feed_meta():
+    """ETag/Last-Modified validators per feed URL from the last successful fetch"""
+    return app.extensions.setdefault('feed_meta', {})
+
+# Statuses from throttling hosts that are worth retrying within the same fetch
+RETRY_STATUSES = (429, 503)
+MAX_FETCH_ATTEMPTS = 3
+
+def _retry_delay(headers, attempt):
+    """Seconds to wait before retrying, honouring a numeric Retry-After header"""
+    retry_after = (headers or {}).get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(int(retry_after), 60)
+    return 2 ** attempt + random.random()
+
+async def _fetch_one(session, feed_info):
+    """Download a single RSS feed, retrying with backoff when the host throttles us"""
+    print(f"Fetching from {feed_info['name']}...")
+    for attempt in range(MAX_FETCH_ATTEMPTS):
+        try:
+            return await _download_feed(session, feed_info)
+        except aiohttp.ClientResponseError as e:
+            if e.status not in RETRY_STATUSES or attempt == MAX_FETCH_ATTEMPTS - 1:
+                raise
+            delay = _retry_delay(e.headers, attempt)
+            print(f"{feed_info['name']} returned {e.status}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def _download_feed(session, feed_info):
+    """Download a feed, returning (body, validators); body is None if unchanged"""
+    meta = feed_meta().get(feed_info['url'], {})
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('modified'):
+        headers['If-Modified-Since'] = meta['modified']
+    
+    async with session.get(
+        feed_info['url'], headers=headers, timeout=aiohttp.ClientTimeout(total=15)
+    ) as response:
+        if response.status == 304:
+            return None, meta
+        response.raise_for_status()
+        body = await response.read()
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'modified': response.headers.get('Last-Modified')
+        }
+    return body, validators
+
+def _new_session():
+    """Create the aiohttp session used for feed downloads"""
+    connector = aiohttp.TCPConnector(
+        limit=16, limit_per_host=4, ttl_dns_cache=300, keepalive_timeout=30
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+async def _fetch_all(session=None):
+    """Download all RSS feeds concurrently, reusing session if one is given"""
+    if session is None:
+        async with _new_session() as session:
+            return await _fetch_all(session)
+    return await asyncio.gather(
+        *[_fetch_one(session, feed_info) for feed_info in RSS_FEEDS],
+        return_exceptions=True
+    )
+
+def parse_feed(feed_info, body):
+    """Parse a downloaded feed into article rows (runs in a worker process)"""
+    feed = feedparser.parse(body)
+    candidates = []
+    
+    for entry in feed.entries[:10]:  # Limit to 10 latest articles per source
+        try:
+            title = clean_text(entry.title)
+            summary = clean_text(entry.get('summary', entry.get('description', '')))
+            url = entry.link
+            
+            # Skip if essential data is missing
+            if not title or not url:
+                continue
+            
+            candidates.append({
+                'title': title,
+                'summary': summary if summary else title,  # Use title as summary if no summary
+                'source_url': url,
+                'source_name': feed_info['name'],
+                'published_time': parse_published_time(entry.get('published_parsed')),
+                'content_hash': generate_content_hash(title, url)
+            })
+            
+        except Exception as e:
+            print(f"Error processing article from {feed_info['name']}: {e}")
+            continue
+    
+    return candidates
+
+def known_sources():
+    """Names of sources with at least one stored article, loaded once per process"""
+    if 'sources' not in app.extensions:
+        app.extensions['sources'] = set(db.session.scalars(
+            db.select(NewsArticle.source_name).distinct()
+        ).all())
+    return app.extensions['sources']
+
+def content_hash_filter():
+    """Bloom filter of every stored content hash, loaded once per process"""
+    if 'content_hashes' not in app.extensions:
+        hashes = db.session.scalars(db.select(NewsArticle.content_hash)).all()
+        bloom = ScalableBloomFilter(initial_capacity=max(len(hashes) * 4, 1000), error_rate=0.001)
+        for content_hash in hashes:
+            bloom.add(content_hash)
+        app.extensions['content_hashes'] = bloom
+    return app.extensions['content_hashes']
 
 def fetch_news():
     """Fetch news from all RSS feeds"""
     print(f"Starting news fetch at {datetime.now()}")
-    new_articles = 0
+    session = app.extensions.get('fetch_session')
+    if session is None:
+        results = asyncio.run(_fetch_all())
+    else:
+        # Running under the ASGI server: download on its loop with the shared session
+        results = asyncio.run_coroutine_threadsafe(
+            _fetch_all(session), app.extensions['fetch_loop']
+        ).result()
+    store_news(results)
+
+def _parse_executor(max_workers):
+    """Executor for parse_feed: a process pool, or one thread where children aren't allowed"""
+    # hypercorn runs its workers as daemonic processes, which can't start a pool
+    if multiprocessing.current_process().daemon:
+        return ThreadPoolExecutor(max_workers=1)
+    # Workers are started from a forkserver, not forked from this multithreaded process
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context('forkserver')
+    )
+
+def store_news(results):
+    """Parse downloaded feeds and store any new articles"""
+    bodies = []
+    for feed_info, result in zip(RSS_FEEDS, results):
+        if isinstance(result, Exception):
+            print(f"Error fetching from {feed_info['name']}: {result}")
+            continue
+        body, feed_validators = result
+        if body is None:
+            print(f"No changes from {feed_info['name']}")
+            continue
+        bodies.append((feed_info, body, feed_validators))
     
-    for feed_info in RSS_FEEDS:
-        try:
-            print(f"Fetching from {feed_info['name']}...")
-            feed = feedparser.parse(feed_info['url'])
-            
-            for entry in feed.entries[:10]:  # Limit to 10 latest articles per source
+    # feedparser is CPU-bound pure Python, so parse feeds in separate processes
+    candidates = []
+    seen_this_cycle = set()
+    validators = {}
+    if bodies:
+        max_workers = min(len(bodies), os.cpu_count() or 1)
+        with _parse_executor(max_workers) as executor:
+            futures = [
+                (feed_info, feed_validators, executor.submit(parse_feed, feed_info, body))
+                for feed_info, body, feed_validators in bodies
+            ]
+            for feed_info, feed_validators, future in futures:
                 try:
-                    title = clean_text(entry.title)
-                    summary = clean_text(entry.get('summary', entry.get('description', '')))
-                    url = entry.link
-                    
-                    # Skip if essential data is missing
-                    if not title or not url:
-                        continue
-                    
-                    # Generate content hash to prevent duplicates
-                    content_hash = generate_content_hash(title, url)
-                    
-                    # Check if article already exists
-                    existing = NewsArticle.query.filter_by(content_hash=content_hash).first()
-                    if existing:
-                        continue
-                    
-                    # Parse publication time
-                    published_time = parse_published_time(entry.get('published_parsed'))
-                    
-                    # Create new article
-                    article = NewsArticle(
-                        title=title,
-                        summary=summary if summary else title,  # Use title as summary if no summary
-                        source_url=url,
-                        source_name=feed_info['name'],
-                        published_time=published_time,
-                        content_hash=content_hash
-                    )
-                    
-                    db.session.add(article)
-                    new_articles += 1
-                    
+                    feed_candidates = future.result()
                 except Exception as e:
-                    print(f"Error processing article from {feed_info['name']}: {e}")
+                    print(f"Error parsing feed from {feed_info['name']}: {e}")
                     continue
-                    
+                # Unparsed feeds keep their old validators so the next fetch downloads them again
+                validators[feed_info['url']] = feed_validators
+                
+                # Skip articles already queued this fetch, e.g. republished by another feed
+                for candidate in feed_candidates:
+                    if candidate['content_hash'] in seen_this_cycle:
+                        continue
+                    seen_this_cycle.add(candidate['content_hash'])
+                    candidates.append(candidate)
+    
+    # Only hashes the Bloom filter may have seen need confirming against the database;
+    # look those up in a single query instead of one per entry
+    bloom = content_hash_filter()
+    hashes = [
+        candidate['content_hash'] for candidate in candidates
+        if candidate['content_hash'] in bloom
+    ]
+    existing = set(db.session.scalars(
+        db.select(NewsArticle.content_hash).where(NewsArticle.content_hash.in_(hashes))
+    ).all()) if hashes else set()
+    
+    rows_by_feed = {}
+    for candidate in candidates:
+        if candidate['content_hash'] in existing:
+            continue
+        rows_by_feed.setdefault(candidate['source_name'], []).append(candidate)
+    
+    # Commit each feed separately so the database write lock is only held briefly
+    new_articles = 0
+    for feed_info in RSS_FEEDS:
+        rows = rows_by_feed.get(feed_info['name'], [])
+        try:
+            # Submit the feed's new articles as one multi-row INSERT
+            if rows:
+                db.session.bulk_insert_mappings(NewsArticle, rows)
+                db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            # Another fetch stored some of these first; make sure they are checked next time
+            for row in rows:
+                bloom.add(row['content_hash'])
+            print(f"Duplicate articles from {feed_info['name']}, retrying next fetch: {e.orig}")
+            continue
         except Exception as e:
-            print(f"Error fetching from {feed_info['name']}: {e}")
+            db.session.rollback()
+            print(f"Error saving articles from {feed_info['name']} to database: {e}")
             continue
+        
+        new_articles += len(rows)
+        known_sources().update(row['source_name'] for row in rows)
+        for row in rows:
+            bloom.add(row['content_hash'])
+        # Only remember validators once the feed's articles are stored
+        if feed_info['url'] in validators:
+            feed_meta()[feed_info['url']] = validators[feed_info['url']]
     
-    try:
-        db.session.commit()
-        print(f"Successfully added {new_articles} new articles")
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error saving to database: {e}")
+    if new_articles:
+        cache.clear()
+    print(f"Successfully added {new_articles} new articles")
 
 # API Routes
+@cache.memoize()
+def count_articles(source):
+    """Count articles for a source (or all sources), cached until the next fetch"""
+    query = NewsArticle.query
+    if source:
+        query = query.filter_by(source_name=source)
+    return query.count()
+
+# Columns returned by /api/news, fetched as Core rows to skip ORM object hydration
+ARTICLE_COLUMNS = (
+    NewsArticle.id,
+    NewsArticle.title,
+    NewsArticle.summary,
+    NewsArticle.source_url,
+    NewsArticle.source_name,
+    NewsArticle.published_time,
+    NewsArticle.created_at
+)
+
+def article_cursor(article):
+    """Keyset cursor pointing just past the given article"""
+    # Stored timestamps are naive UTC; label them like the articles in the payload
+    published_time = article.published_time
+    if published_time.tzinfo is None:
+        published_time = published_time.replace(tzinfo=timezone.utc)
+    return {'after_ts': published_time.isoformat(), 'after_id': article.id}
+
 @app.route('/api/news', methods=['GET'])
+@cache.cached(query_string=True, response_filter=is_cacheable)
 def get_news():
     """Get latest news articles"""
     try:
-        page = request.args.get('page', 1, type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
         per_page = request.args.get('per_page', 20, type=int)
+        if per_page < 1:
+            per_page = 20
         source = request.args.get('source', '')
+        after_ts = request.args.get('after_ts', '')
+        after_id = request.args.get('after_id', type=int)
         
-        query = NewsArticle.query
+        stmt = db.select(*ARTICLE_COLUMNS)
         
         if source:
-            query = query.filter_by(source_name=source)
+            stmt = stmt.where(NewsArticle.source_name == source)
+        
+        stmt = stmt.order_by(NewsArticle.published_time.desc(), NewsArticle.id.desc())
+        
+        # Keyset pagination: seek past the cursor instead of scanning an OFFSET
+        if bool(after_ts) != (after_id is not None):
+            return ojson({'error': 'after_ts and after_id must be given together'}, 400)
+        if after_ts:
+            try:
+                after_ts = datetime.fromisoformat(after_ts)
+            except ValueError:
+                return ojson({'error': 'Invalid after_ts cursor'}, 400)
+            # Stored timestamps are naive UTC
+            if after_ts.tzinfo:
+                after_ts = after_ts.astimezone(timezone.utc).replace(tzinfo=None)
+            
+            articles = db.session.execute(stmt.where(
+                db.tuple_(NewsArticle.published_time, NewsArticle.id) < (after_ts, after_id)
+            ).limit(per_page + 1)).all()
+            has_next = len(articles) > per_page
+            articles = articles[:per_page]
+            
+            return ojson({
+                'articles': [dict(article._mapping) for article in articles],
+                'has_next': has_next,
+                'next_cursor': article_cursor(articles[-1]) if has_next else None
+            })
         
-        articles = query.order_by(NewsArticle.published_time.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        total = count_articles(source)
+        pages = (total + per_page - 1) // per_page
+        articles = db.session.execute(
+            stmt.offset((page - 1) * per_page).limit(per_page)
+        ).all()
         
-        return jsonify({
-            'articles': [article.to_dict() for article in articles.items],
-            'total': articles.total,
-            'pages': articles.pages,
+        return ojson({
+            'articles': [dict(article._mapping) for article in articles],
+            'total': total,
+            'pages': pages,
             'current_page': page,
-            'has_next': articles.has_next,
-            'has_prev': articles.has_prev
+            'has_next': page < pages,
+            'has_prev': page > 1,
+            'next_cursor': article_cursor(articles[-1]) if articles and page < pages else None
         })
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojson({'error': str(e)}, 500)
 
 @app.route('/api/sources', methods=['GET'])
+@cache.cached(query_string=True, response_filter=is_cacheable)
 def get_sources():
     """Get available news sources"""
-    sources = db.session.query(NewsArticle.source_name).distinct().all()
-    return jsonify([source[0] for source in sources])
+    return ojson(sorted(known_sources()))
 
 @app.route('/api/stats', methods=['GET'])
+@cache.cached(query_string=True, response_filter=is_cacheable)
 def get_stats():
     """Get application statistics"""
     try:
         total_articles = NewsArticle.query.count()
         sources_count = db.session.query(NewsArticle.source_name).distinct().count()
-        latest_update = db.session.query(NewsArticle.created_at).order_by(
-            NewsArticle.created_at.desc()
-        ).first()
+        latest_update = db.session.scalar(db.select(db.func.max(NewsArticle.created_at)))
         
-        return jsonify({
+        return ojson({
             'total_articles': total_articles,
             'sources_count': sources_count,
-            'latest_update': latest_update[0].isoformat() if latest_update else None,
+            'latest_update': latest_update,
             'update_frequency': '3 hours'
         })
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojson({'error': str(e)}, 500)
 
 @app.route('/api/fetch-now', methods=['POST'])
 def fetch_now():
     """Manually trigger news fetch"""
     try:
         fetch_news()
-        return jsonify({'message': 'News fetch completed successfully'})
+        return ojson({'message': 'News fetch completed successfully'})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojson({'error': str(e)}, 500)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    return ojson({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
-# Initialize scheduler
-def init_scheduler():
-    """Initialize the background scheduler"""
-    scheduler = BackgroundScheduler(daemon=True)
-    # Fetch news every 3 hours
-    scheduler.add_job(fetch_news, 'interval', hours=3, id='news_fetcher')
-    scheduler.start()
-    return scheduler
+# Periodic news fetch
+FETCH_INTERVAL = 3 * 60 * 60  # Fetch news every 3 hours
 
-if __name__ == '__main__':
-    # Create database tables
+def _upgrade_created_at():
+    """Give tables created before created_at had a server default one, backfilling NULLs"""
+    columns = {column['name']: column for column in inspect(db.engine).get_columns('news_article')}
+    if columns['created_at'].get('default') is not None:
+        return
+    
+    print("Adding server default to news_article.created_at...")
+    with db.engine.begin() as conn:
+        if db.engine.dialect.name == 'sqlite':
+            # SQLite can't alter a column's default, so rebuild the table
+            for index in NewsArticle.__table__.indexes:
+                conn.execute(db.text(f'DROP INDEX IF EXISTS {index.name}'))
+            conn.execute(db.text('ALTER TABLE news_article RENAME TO news_article_old'))
+            NewsArticle.__table__.create(conn)
+            conn.execute(db.text(
+                'INSERT INTO news_article (id, title, summary, source_url, source_name, '
+                'published_time, created_at, content_hash) '
+                'SELECT id, title, summary, source_url, source_name, published_time, '
+                'COALESCE(created_at, CURRENT_TIMESTAMP), content_hash FROM news_article_old'
+            ))
+            conn.execute(db.text('DROP TABLE news_article_old'))
+        else:
+            conn.execute(db.text('ALTER TABLE news_article ALTER COLUMN created_at SET DEFAULT now()'))
+            conn.execute(db.text('UPDATE news_article SET created_at = now() WHERE created_at IS NULL'))
+            conn.execute(db.text('ALTER TABLE news_article ALTER COLUMN created_at SET NOT NULL'))
+
+def _rehash_legacy_articles():
+    """Move rows stored with the old 64-character SHA-256 content_hash to the current hash"""
+    legacy = db.session.execute(
+        db.select(NewsArticle.id, NewsArticle.title, NewsArticle.source_url)
+        .where(db.func.length(NewsArticle.content_hash) == 64)
+    ).all()
+    if not legacy:
+        return
+    
+    # Title and URL are stored exactly as they were hashed
+    rehashed = [
+        {'id': row.id, 'content_hash': generate_content_hash(row.title, row.source_url)}
+        for row in legacy
+    ]
+    # Drop copies fetched again after the hash change, keeping the original rows
+    duplicates = 0
+    for start in range(0, len(rehashed), 500):
+        hashes = [row['content_hash'] for row in rehashed[start:start + 500]]
+        duplicates += db.session.execute(
+            db.delete(NewsArticle).where(NewsArticle.content_hash.in_(hashes))
+        ).rowcount
+    db.session.bulk_update_mappings(NewsArticle, rehashed)
+    db.session.commit()
+    print(f"Rehashed {len(rehashed)} articles, removed {duplicates} duplicates")
+
+def init_db():
+    """Create database tables and upgrade older schemas"""
     with app.app_context():
         db.create_all()
-        
-        # Fetch initial news if database is empty
-        if NewsArticle.query.count() == 0:
-            print("Database is empty. Fetching initial news...")
-            fetch_news()
+        _upgrade_created_at()
+        # create_all() skips existing tables, so add indexes introduced since then
+        for index in NewsArticle.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+        _rehash_legacy_articles()
+
+def _store_news_in_context(results):
+    """Run store_news from a worker thread"""
+    with app.app_context():
+        store_news(results)
+
+async def _periodic_fetch(session):
+    """Fetch news on the server's event loop, sharing one aiohttp session across runs"""
+    # The first run is the initial fetch, kept out of lifespan startup so slow or
+    # throttled feeds can't hit the server's startup timeout
+    while True:
+        try:
+            print(f"Starting news fetch at {datetime.now()}")
+            results = await _fetch_all(session)
+            # Parsing and database writes stay synchronous, off the event loop
+            await asyncio.to_thread(_store_news_in_context, results)
+        except Exception as e:
+            print(f"Error during scheduled news fetch: {e}")
+        await asyncio.sleep(FETCH_INTERVAL)
+
+# ASGI entry point (hypercorn app:asgi_app); Flask handles HTTP requests on a thread
+# pool, so a slow fetch can't block the API, while feed downloads and the periodic
+# fetch run on the server's loop
+wsgi_app = WSGIMiddleware(app, workers=10)
+
+async def _close_fetch_session():
+    """Close the shared aiohttp session opened at lifespan startup, if any"""
+    session = app.extensions.pop('fetch_session', None)
+    app.extensions.pop('fetch_loop', None)
+    if session:
+        await session.close()
+
+async def asgi_app(scope, receive, send):
+    """Serve the Flask app and run the periodic fetch for the server's lifetime"""
+    if scope['type'] != 'lifespan':
+        return await wsgi_app(scope, receive, send)
     
-    # Start scheduler
-    scheduler = init_scheduler()
+    fetch_task = None
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await asyncio.to_thread(init_db)
+                session = _new_session()
+                app.extensions['fetch_loop'] = asyncio.get_running_loop()
+                app.extensions['fetch_session'] = session
+                fetch_task = asyncio.create_task(_periodic_fetch(session))
+            except Exception as e:
+                # Report the failure so the server stops instead of running without a fetch loop
+                print(f"Error during startup: {e}")
+                await _close_fetch_session()
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            print("Shutting down...")
+            if fetch_task:
+                fetch_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await fetch_task
+            await _close_fetch_session()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+if __name__ == '__main__':
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
     
-    try:
-        # Run Flask app
-        app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)), debug=False)
-    except KeyboardInterrupt:
-        print("Shutting down...")
-        scheduler.shutdown()
\ No newline at end of file
+    config = Config()
+    config.bind = [f"0.0.0.0:{os.getenv('PORT', 5000)}"]
+    asyncio.run(serve(asgi_app, config))